@@ -55,6 +55,289 @@ IMPLEMENTATION TIME: 5-7 days for full knowledge base integration
 import streamlit as st
 import requests
 import json
+import hashlib
+import re
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+from openai import OpenAI
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+EMBEDDING_DIM = 256
+EMBEDDING_MODEL = "text-embedding-3-small"
+INFINITY_MODEL = "BAAI/bge-small-en-v1.5"
+EMBED_BATCH_SIZE = 128
+CHAT_MODEL = "gpt-4o-mini"
+RETRIEVAL_K = 5
+KB_INDEX_DIR = os.environ.get("KB_INDEX_DIR", ".kb_index")
+SEMANTIC_CACHE_THRESHOLD = 0.95  # cosine similarity needed to reuse an earlier result
+SEMANTIC_CACHE_SIZE = 256
+SEMANTIC_CACHE_TTL_SECONDS = 3600
+
+
+# Demo embedder: hashed bag-of-words, L2-normalised (stands in for OpenAI embeddings)
+def _embed_text(text):
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for token in re.findall(r"[a-z0-9']+", text.lower()):
+        bucket = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=4).digest(), "little")
+        vector[bucket % EMBEDDING_DIM] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+# One OpenAI client per process, shared by reruns and sessions along with its connection pool
+@st.cache_resource
+def get_openai():
+    return OpenAI()
+
+
+# Pooled keep-alive session shared across reruns for the self-hosted embedding server
+@st.cache_resource
+def get_http_session():
+    session = requests.Session()
+    retries = Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=frozenset({"POST"}))
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# One embedding request per call. Provider order: a local Infinity server (INFINITY_URL,
+# dynamic batching across concurrent users), OpenAI (OPENAI_API_KEY), then the demo embedder.
+def _embed_texts(texts):
+    if os.environ.get("INFINITY_URL"):
+        response = get_http_session().post(
+            f"{os.environ['INFINITY_URL'].rstrip('/')}/embeddings",
+            json={"model": INFINITY_MODEL, "input": texts},
+            timeout=30
+        )
+        response.raise_for_status()
+        return np.array([item["embedding"] for item in response.json()["data"]], dtype=np.float32)
+    if os.environ.get("OPENAI_API_KEY"):
+        response = get_openai().embeddings.create(input=texts, model=EMBEDDING_MODEL)
+        return np.array([item.embedding for item in response.data], dtype=np.float32)
+    return np.array([_embed_text(text) for text in texts], dtype=np.float32)
+
+
+# Ingestion embeds documents in batches instead of one API round-trip per chunk
+def embed_batch(texts, batch_size=EMBED_BATCH_SIZE):
+    return np.concatenate([_embed_texts(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)])
+
+
+# Embed each distinct string once - repeat searches and reruns skip the embedding model
+@st.cache_data(max_entries=1024, show_spinner=False)
+def get_cached_embedding(text):
+    return tuple(_embed_texts([text])[0].tolist())
+
+
+# Symmetric int8 quantisation: one scale per matrix, a quarter of the float32 footprint
+def _quantize(matrix):
+    scale = float(np.abs(matrix).max()) / 127.0 or 1.0
+    return np.round(matrix / scale).astype(np.int8), scale
+
+
+def _embedding_provider():
+    if os.environ.get("INFINITY_URL"):
+        return f"infinity:{INFINITY_MODEL}"
+    if os.environ.get("OPENAI_API_KEY"):
+        return f"openai:{EMBEDDING_MODEL}"
+    return f"demo:{EMBEDDING_DIM}"
+
+
+# Write through a uniquely named temp file and rename it into place, so concurrent builders
+# (several processes on a shared disk) never interleave writes or publish a partial file
+def _publish_index_file(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=KB_INDEX_DIR, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            if isinstance(data, bytes):
+                f.write(data)
+            else:
+                np.save(f, data)
+        # mkstemp creates the file owner-only; other processes sharing the directory need to read it
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _open_codes(path):
+    with open(path + ".json") as f:
+        scale = json.load(f)["scale"]
+    return np.load(path + ".npy", mmap_mode="r"), scale
+
+
+# int8 codes are written to KB_INDEX_DIR once and memory-mapped, so the OS pages rows in from
+# disk on demand instead of the index having to fit in RAM. The file name fingerprints the
+# documents and embedding model. Files for older fingerprints are left in place, since other
+# processes may still be serving them.
+def _load_or_build_codes(source, docs):
+    fingerprint = hashlib.blake2b(json.dumps([_embedding_provider(), docs], sort_keys=True).encode(), digest_size=8).hexdigest()
+    path = os.path.join(KB_INDEX_DIR, f"{source}-{fingerprint}")
+    try:
+        return _open_codes(path)
+    except FileNotFoundError:
+        pass
+    codes, scale = _quantize(embed_batch([doc["content"] for doc in docs]))
+    os.makedirs(KB_INDEX_DIR, exist_ok=True)
+    # The scale goes first, so once the .npy exists its .json does too
+    _publish_index_file(path + ".json", json.dumps({"scale": scale}).encode())
+    _publish_index_file(path + ".npy", codes)
+    return _open_codes(path)
+
+
+# Open one retrieval backend's index once per process, shared across sessions.
+# Rows are also indexed by customer_id (shared docs have none) for metadata pre-filtering.
+# knowledge_version keys the entry on the current documents, so edited docs reopen the index.
+@st.cache_resource(show_spinner=False)
+def load_source_index(source, knowledge_version):
+    docs = knowledge_sources[source]
+    codes, scale = _load_or_build_codes(source, docs)
+    owners = [doc.get("customer_id") for doc in docs]
+    rows_by_customer = {
+        customer_id: np.array([i for i, owner in enumerate(owners) if owner in (None, customer_id)], dtype=np.intp)
+        for customer_id in customers
+    }
+    return {"docs": docs, "codes": codes, "scale": scale, "rows_by_customer": rows_by_customer}
+
+
+# Only the selected customer's rows (plus shared docs) are scored
+def _search_index(index, query_embedding, k, customer_id):
+    rows = index["rows_by_customer"][customer_id]
+    query_codes, query_scale = _quantize(query_embedding)
+    # int32 accumulation of the int8 dot products, rescaled back to cosine similarity
+    scores = (index["codes"][rows].astype(np.int32) @ query_codes.astype(np.int32)) * (index["scale"] * query_scale)
+    # argpartition selects the top k in O(n); only those k get sorted
+    k = min(k, scores.size)
+    if k == 0:
+        return []
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return [{**index["docs"][rows[i]], "score": float(scores[i])} for i in top]
+
+
+async def retrieve_from_source_async(index, query_embedding, k, customer_id):
+    # Each backend is searched off the event loop so the slow ones overlap
+    return await asyncio.to_thread(_search_index, index, query_embedding, k, customer_id)
+
+
+# Duplicate chunks from overlapping sources would spend the LLM's context window twice.
+# Content is compared by a 64-bit BLAKE2b digest after collapsing case and whitespace;
+# docs arrive best-first, so the highest-scoring copy is kept.
+def deduplicate_by_content(docs):
+    seen = set()
+    deduped = []
+    for doc in docs:
+        content_hash = hashlib.blake2b(" ".join(doc["content"].split()).casefold().encode(), digest_size=8).digest()
+        if content_hash not in seen:
+            seen.add(content_hash)
+            deduped.append(doc)
+    return deduped
+
+
+# Fan out to every backend at once: latency is the slowest source, not the sum
+async def parallel_retrieve(query_embedding, indexes, customer_id, k=5):
+    tasks = [asyncio.create_task(retrieve_from_source_async(index, query_embedding, k, customer_id)) for index in indexes.values()]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    docs, failed = [], []
+    for source, result in zip(indexes, results):
+        if isinstance(result, Exception):
+            failed.append(source)
+        else:
+            docs.extend(result)
+    docs.sort(key=lambda doc: doc["score"], reverse=True)
+    return deduplicate_by_content(docs), failed
+
+
+# Reuses retrieval results for near-duplicate queries ("how do I upgrade" / "how to upgrade account").
+# Entries only match within the same scope (customer, k), expire after a TTL and are evicted LRU-first.
+# Embeddings live in one preallocated float32 block so a lookup is a single BLAS matrix-vector product.
+class SemanticCache:
+    def __init__(self, max_entries, ttl_seconds, threshold):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self.embeddings = None
+        self.entries = []
+        self.lock = threading.Lock()
+
+    def lookup(self, scope, query_embedding):
+        with self.lock:
+            self._expire()
+            if not self.entries or self.embeddings.shape[1] != query_embedding.size:
+                return None
+            similarities = self.embeddings[:len(self.entries)] @ query_embedding.astype(np.float32, copy=False)
+            similarities[[entry["scope"] != scope for entry in self.entries]] = -np.inf
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+            self.entries[best]["last_used"] = time.monotonic()
+            return self.entries[best]["result"]
+
+    def store(self, scope, query_embedding, result):
+        with self.lock:
+            self._expire()
+            if len(self.entries) >= self.max_entries:
+                self._drop([min(range(len(self.entries)), key=lambda i: self.entries[i]["last_used"])])
+            if self.embeddings is None or self.embeddings.shape[1] != query_embedding.size:
+                self.embeddings = np.empty((self.max_entries, query_embedding.size), dtype=np.float32)
+                self.entries = []
+            self.embeddings[len(self.entries)] = query_embedding
+            now = time.monotonic()
+            self.entries.append({"scope": scope, "result": result, "created_at": now, "last_used": now})
+
+    def _expire(self):
+        now = time.monotonic()
+        stale = [i for i, entry in enumerate(self.entries) if now - entry["created_at"] > self.ttl_seconds]
+        if stale:
+            self._drop(stale)
+
+    def _drop(self, rows):
+        keep = np.setdiff1d(np.arange(len(self.entries)), rows)
+        self.entries = [self.entries[i] for i in keep]
+        self.embeddings[:keep.size] = self.embeddings[keep]
+
+
+# Fingerprint of the indexed documents; any edit starts a fresh semantic cache
+def _knowledge_version():
+    return hashlib.blake2b(json.dumps(knowledge_sources, sort_keys=True).encode(), digest_size=8).hexdigest()
+
+
+@st.cache_resource(max_entries=1)
+def get_semantic_cache(knowledge_version):
+    return SemanticCache(SEMANTIC_CACHE_SIZE, SEMANTIC_CACHE_TTL_SECONDS, SEMANTIC_CACHE_THRESHOLD)
+
+
+# Yield the answer as it is generated so the first tokens render immediately
+# (canned demo answer when no OPENAI_API_KEY is configured)
+def stream_response(query, customer_info, docs):
+    context = "\n".join(f"[{doc['source']}] {doc['content']}" for doc in docs)
+    if os.environ.get("OPENAI_API_KEY"):
+        stream = get_openai().chat.completions.create(
+            model=CHAT_MODEL,
+            stream=True,
+            messages=[
+                {"role": "system", "content": "You are a customer success assistant. Answer using only the provided context and name the sources you used."},
+                {"role": "user", "content": f"Customer: {customer_info['name']} (health {customer_info['health']}, value {customer_info['value']})\n\nContext:\n{context}\n\nQuestion: {query}"}
+            ]
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+        return
+
+    answer = f"Based on {customer_info['name']}'s account data and our documentation, here's what I found...\n\n"
+    answer += "\n".join(f"- {doc['content']}" for doc in docs)
+    for word in answer.split(" "):
+        yield word + " "
+
 
 st.title("🎯 Customer Success RAG System Demo")
 
@@ -65,6 +348,26 @@ customers = {
     "startup_co": {"name": "StartupCo", "health": 45, "value": "$5,000"}
 }
 
+# Mock retrieval backends for demo (CRM notes, document vector store, ticket history)
+knowledge_sources = {
+    "hubspot": [
+        {"source": "HubSpot CRM Notes", "customer_id": "acme_corp", "content": "Acme Corp renewal is due in March; their champion asked about upgrading the account to premium seats."},
+        {"source": "HubSpot CRM Notes", "customer_id": "tech_solutions", "content": "Tech Solutions Inc changed billing contact; premium features are invoiced monthly on their plan."},
+        {"source": "HubSpot CRM Notes", "customer_id": "startup_co", "content": "StartupCo health score dropped after onboarding stalled, only two active users in the last 30 days."}
+    ],
+    "vector_db": [
+        {"source": "Customer Success Playbook", "content": "Improve customer health score with quarterly business reviews, onboarding check-ins and product usage monitoring."},
+        {"source": "Admin Guide", "content": "Upgrade an account and enable premium features from the billing settings page."},
+        {"source": "Admin Guide", "content": "Login issues: check SSO configuration, password reset emails and locked user accounts."},
+        {"source": "Billing FAQ", "content": "Premium features are billed monthly and prorated from the upgrade date on the billing process invoice."}
+    ],
+    "tickets": [
+        {"source": "Support Tickets", "customer_id": "acme_corp", "content": "Acme Corp ticket #1042: users locked out of login after SSO certificate rotation, fixed by re-uploading the certificate."},
+        {"source": "Support Tickets", "customer_id": "tech_solutions", "content": "Tech Solutions Inc ticket #1121: question about the billing process for premium features."},
+        {"source": "Support Tickets", "customer_id": "startup_co", "content": "StartupCo ticket #1187: login issues because password reset emails were landing in spam."}
+    ]
+}
+
 # Demo interface
 st.sidebar.title("Select Customer")
 selected_customer = st.sidebar.selectbox("Customer Account", list(customers.keys()))
@@ -72,6 +375,7 @@ selected_customer = st.sidebar.selectbox("Customer Account", list(customers.keys
 customer_info = customers[selected_customer]
 st.sidebar.metric("Health Score", customer_info["health"])
 st.sidebar.metric("Account Value", customer_info["value"])
+use_semantic_cache = st.sidebar.checkbox("⚡ Reuse results for similar questions")
 
 # Main chat interface
 st.subheader(f"💬 Support Chat: {customer_info['name']}")
@@ -91,19 +395,35 @@ user_query = st.text_input("Ask about this customer:", value=selected_query)
 if st.button("🔍 Search Knowledge Base") and user_query:
     # Simulate n8n webhook call
     with st.spinner("Searching customer data and documents..."):
-        # Mock response for demo
-        mock_response = {
-            "response": f"Based on {customer_info['name']}'s account data and our documentation, here's what I found...",
-            "sources_used": ["Customer Success Playbook", "Admin Guide"],
-            "customer_context": customer_info
-        }
-        
+        query_embedding = np.asarray(get_cached_embedding(user_query), dtype=np.float32)
+        knowledge_version = _knowledge_version()
+        semantic_cache = get_semantic_cache(knowledge_version) if use_semantic_cache else None
+        cache_scope = (selected_customer, RETRIEVAL_K)
+        top_docs = semantic_cache.lookup(cache_scope, query_embedding) if semantic_cache else None
+        cache_hit = top_docs is not None
+        failed_sources = []
+
+        if not cache_hit:
+            indexes = {source: load_source_index(source, knowledge_version) for source in knowledge_sources}
+            retrieved_docs, failed_sources = asyncio.run(parallel_retrieve(query_embedding, indexes, selected_customer, k=RETRIEVAL_K))
+            top_docs = [doc for doc in retrieved_docs if doc["score"] > 0][:3]
+            if semantic_cache and not failed_sources:
+                semantic_cache.store(cache_scope, query_embedding, top_docs)
+
+    if cache_hit:
+        st.caption("⚡ Reused results from a similar earlier question")
+    for source in failed_sources:
+        st.warning(f"⚠️ {source} is unavailable, results may be incomplete")
+    if not top_docs:
+        # Nothing scored above zero: don't ask the model to answer from an empty context
+        st.info("No matching documents found for this question. Try rephrasing it.")
+    else:
         st.success("✅ Found relevant information!")
         st.write("**AI Response:**")
-        st.write(mock_response["response"])
-        
+        st.write_stream(stream_response(user_query, customer_info, top_docs))
+
         st.write("**Sources Referenced:**")
-        for source in mock_response["sources_used"]:
+        for source in dict.fromkeys(doc["source"] for doc in top_docs):
             st.write(f"📄 {source}")
 
 # Demo metrics
@@ -49,15 +49,238 @@ import requests
 import json
 import pandas as pd
 import plotly.express as px
+import numpy as np
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+HUBSPOT_BATCH_READ_URL = "https://api.hubapi.com/crm/v3/objects/contacts/batch/read"
+HUBSPOT_BATCH_SIZE = 100  # batch/read accepts up to 100 inputs
+HUBSPOT_MAX_REQUESTS = 9  # per HUBSPOT_WINDOW_SECONDS
+HUBSPOT_WINDOW_SECONDS = 5
+AUTOMATED_MINUTES_PER_LEAD = 0.5  # 30 seconds
+SCORING_BATCH_WINDOW_SECONDS = 0.02
+SCORING_MAX_BATCH = 32
+
+# All personal email domains in one precompiled pattern, matched once per email
+_PERSONAL_DOMAINS_RE = re.compile(r"@(?:gmail|yahoo|hotmail|outlook|aol|icloud|protonmail)\.com$", re.IGNORECASE)
+
+
+# Sliding-window limiter: blocks until another request fits in the window
+class RequestThrottle:
+    def __init__(self, max_requests, window_seconds):
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.sent_at = deque()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            while True:
+                now = time.monotonic()
+                while self.sent_at and now - self.sent_at[0] >= self.window_seconds:
+                    self.sent_at.popleft()
+                if len(self.sent_at) < self.max_requests:
+                    self.sent_at.append(now)
+                    return
+                time.sleep(self.window_seconds - (now - self.sent_at[0]))
+
+
+# Pooled keep-alive session shared across reruns: TCP/TLS setup is paid once, not per call
+@st.cache_resource
+def get_http_session():
+    session = requests.Session()
+    retries = Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=frozenset({"GET", "POST"}))
+    session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retries))
+    return session
+
+
+# One throttle per process so concurrent sessions share the HubSpot rate limit
+@st.cache_resource
+def get_hubspot_throttle():
+    return RequestThrottle(HUBSPOT_MAX_REQUESTS, HUBSPOT_WINDOW_SECONDS)
+
+
+def _read_contacts_batch(session, throttle, emails):
+    throttle.wait()
+    response = session.post(
+        HUBSPOT_BATCH_READ_URL,
+        headers={"Authorization": f"Bearer {os.environ['HUBSPOT_API_KEY']}"},
+        json={
+            "idProperty": "email",
+            "properties": ["email", "firstname", "lastname", "company", "jobtitle"],
+            "inputs": [{"id": email} for email in emails]
+        },
+        timeout=10
+    )
+    response.raise_for_status()
+    return response.json()["results"]
+
+
+# Fetch contacts by email, 100 per request with at most 9 requests in flight
+def fetch_hubspot_contacts(emails):
+    session = get_http_session()
+    throttle = get_hubspot_throttle()
+    batches = [emails[i:i + HUBSPOT_BATCH_SIZE] for i in range(0, len(emails), HUBSPOT_BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=HUBSPOT_MAX_REQUESTS) as pool:
+        results = list(pool.map(lambda batch: _read_contacts_batch(session, throttle, batch), batches))
+    return {
+        contact["properties"]["email"].lower(): contact["properties"]
+        for batch in results for contact in batch
+    }
 
 
 # Free demo data - no APIs needed for portfolio display
-demo_leads = [
-    {"name": "John Smith", "email": "john@techcorp.com", "company": "TechCorp", "manual_score": "Unknown", "ai_score": 85, "insights": "High-value prospect from tech company", "time_saved": "8 minutes"},
-    {"name": "Jane Doe", "email": "jane@gmail.com", "company": "", "manual_score": "Unknown", "ai_score": 25, "insights": "Personal email, no company info", "time_saved": "5 minutes"},
-    {"name": "Mike Johnson", "email": "mike@enterprise-solutions.com", "company": "Enterprise Solutions Inc", "manual_score": "Unknown", "ai_score": 92, "insights": "Enterprise company, decision maker likely", "time_saved": "12 minutes"},
-    {"name": "Sarah Wilson", "email": "sarah@startup.io", "company": "InnovateStartup", "manual_score": "Unknown", "ai_score": 70, "insights": "Startup, good potential but limited budget", "time_saved": "6 minutes"}
-]
+# Typed records: tables read each field as a column view instead of looping over dicts
+_LEAD_DTYPE = np.dtype([
+    ("name", "U32"), ("email", "U64"), ("company", "U32"), ("manual_score", "U16"),
+    ("ai_score", "i4"), ("insights", "U64"), ("time_saved", "U16")
+])
+
+
+# Built once per process: Streamlit re-executes module-level code on every rerun.
+# The shared array is read-only so no session can modify it for the others.
+@st.cache_resource
+def get_demo_leads():
+    leads = np.array([
+        ("John Smith", "john@techcorp.com", "TechCorp", "Unknown", 85, "High-value prospect from tech company", "8 minutes"),
+        ("Jane Doe", "jane@gmail.com", "", "Unknown", 25, "Personal email, no company info", "5 minutes"),
+        ("Mike Johnson", "mike@enterprise-solutions.com", "Enterprise Solutions Inc", "Unknown", 92, "Enterprise company, decision maker likely", "12 minutes"),
+        ("Sarah Wilson", "sarah@startup.io", "InnovateStartup", "Unknown", 70, "Startup, good potential but limited budget", "6 minutes")
+    ], dtype=_LEAD_DTYPE)
+    leads.flags.writeable = False
+    return leads
+
+
+_LEADS = get_demo_leads()
+
+
+# Tables and charts are rebuilt only when their inputs change, not on every rerun.
+# Charts are cached as plain figure dicts, which are cheaper to pickle than Figure objects.
+@st.cache_data
+def build_manual_df(lead_names):
+    manual_df = pd.DataFrame({"Lead": lead_names})
+    manual_df["Status"] = "Pending Research..."
+    manual_df["Score"] = "Unknown"
+    manual_df["Time Required"] = "10-15 min"
+    return manual_df
+
+
+@st.cache_data
+def build_automated_df(leads):
+    automated_df = pd.DataFrame.from_records(leads, columns=["name", "ai_score", "time_saved"])
+    automated_df.columns = ["Lead", "AI Score", "Time Saved"]
+    automated_df.insert(1, "Status", "✅ Analyzed")
+    return automated_df
+
+
+@st.cache_data
+def build_score_gauge(score):
+    fig = px.pie(
+        values=[score, 100 - score],
+        names=['Score', 'Remaining'],
+        title=f"Lead Score: {score}/100",
+        color_discrete_sequence=['#00CC88', '#EEEEEE']
+    )
+    fig.update_layout(showlegend=False, height=300)
+    return fig.to_dict()
+
+
+@st.cache_data
+def build_roi_chart(annual_cost, annual_cost_auto):
+    roi_data = pd.DataFrame({
+        "Process": ["Manual", "AI Automated"],
+        "Annual Cost": [annual_cost, annual_cost_auto]
+    })
+    return px.bar(roi_data, x="Process", y="Annual Cost",
+                  title="Annual Cost Comparison",
+                  color="Process",
+                  color_discrete_sequence=['#FF6B6B', '#4ECDC4']).to_dict()
+
+
+# Simulated AI analysis (no actual API call for demo)
+def score_lead(email, company):
+    if _PERSONAL_DOMAINS_RE.search(email.strip()):
+        return 30, "Personal email domain suggests lower business intent"
+    if company and len(company) > 5:
+        return 85, "Professional company email and established business"
+    return 50, "Moderate potential, needs further qualification"
+
+
+# Batch entry point: every queued lead is scored in one call (one model request when model-backed)
+def score_leads(leads):
+    return [score_lead(email, company) for email, company in leads]
+
+
+# Coalesces scoring requests from concurrent sessions. A worker thread waits up to 20 ms
+# (or until 32 requests are queued), scores the batch in one call and resolves each Future.
+class MicroBatcher:
+    def __init__(self, batch_fn, window_seconds, max_batch):
+        self.batch_fn = batch_fn
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self.pending = deque()
+        self.ready = threading.Condition()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, item):
+        future = Future()
+        with self.ready:
+            self.pending.append((item, future))
+            self.ready.notify()
+        return future
+
+    def _run(self):
+        while True:
+            with self.ready:
+                while not self.pending:
+                    self.ready.wait()
+                deadline = time.monotonic() + self.window_seconds
+                while len(self.pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.ready.wait(remaining)
+                batch = [self.pending.popleft() for _ in range(min(self.max_batch, len(self.pending)))]
+            try:
+                results = self.batch_fn([item for item, _ in batch])
+            except Exception as exc:
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+
+# One batcher (and worker thread) per process, shared by every session
+@st.cache_resource
+def get_scoring_batcher():
+    return MicroBatcher(score_leads, SCORING_BATCH_WINDOW_SECONDS, SCORING_MAX_BATCH)
+
+
+# Works on scalars and broadcast arrays alike, so the metrics and the sensitivity grid share one formula
+def compute_annual_savings(leads_per_month, minutes_per_lead, hourly_rate):
+    return leads_per_month * (minutes_per_lead - AUTOMATED_MINUTES_PER_LEAD) / 60 * hourly_rate * 12
+
+
+# Savings for every lead volume x hourly rate pair in one broadcast op (20 x 21 grid)
+@st.cache_data
+def build_sensitivity_heatmap(time_per_lead):
+    leads = np.arange(100, 2001, 100)[:, None]
+    rates = np.arange(20, 121, 5)[None, :]
+    annual_savings_grid = compute_annual_savings(leads, time_per_lead, rates)
+    return px.imshow(annual_savings_grid, x=rates.ravel(), y=leads.ravel(),
+                     labels=dict(x="Staff hourly rate ($)", y="Leads per month", color="Annual Savings ($)"),
+                     title="Annual Savings Sensitivity",
+                     origin="lower", aspect="auto",
+                     color_continuous_scale="Teal").to_dict()
+
 
 st.set_page_config(page_title="HubSpot AI Lead Intelligence Demo", layout="wide")
 
@@ -84,12 +307,7 @@ if demo_mode == "Before/After Comparison":
         st.write("4. Guess lead quality")
         st.write("5. Manual data entry")
         
-        manual_df = pd.DataFrame({
-            "Lead": [lead["name"] for lead in demo_leads],
-            "Status": ["Pending Research..."] * len(demo_leads),
-            "Score": ["Unknown"] * len(demo_leads),
-            "Time Required": ["10-15 min"] * len(demo_leads)
-        })
+        manual_df = build_manual_df(_LEADS["name"])
         st.dataframe(manual_df, use_container_width=True)
     
     with col2:
@@ -102,12 +320,7 @@ if demo_mode == "Before/After Comparison":
         st.write("4. HubSpot auto-update")
         st.write("5. Task creation for follow-up")
         
-        automated_df = pd.DataFrame({
-            "Lead": [lead["name"] for lead in demo_leads],
-            "Status": ["✅ Analyzed"] * len(demo_leads),
-            "AI Score": [lead["ai_score"] for lead in demo_leads],
-            "Time Saved": [lead["time_saved"] for lead in demo_leads]
-        })
+        automated_df = build_automated_df(_LEADS)
         st.dataframe(automated_df, use_container_width=True)
 
 elif demo_mode == "Live Scoring":
@@ -123,16 +336,15 @@ elif demo_mode == "Live Scoring":
         demo_company = st.text_input("Company", "TechCorp Solutions")
         
         if st.button("🔍 Analyze Lead"):
-            # Simulate AI analysis (no actual API call for demo)
-            if "@gmail.com" in demo_email or "@yahoo.com" in demo_email:
-                score = 30
-                insights = "Personal email domain suggests lower business intent"
-            elif demo_company and len(demo_company) > 5:
-                score = 85
-                insights = "Professional company email and established business"
-            else:
-                score = 50
-                insights = "Moderate potential, needs further qualification"
+            # Enrich from HubSpot when a private app token is configured
+            if os.environ.get("HUBSPOT_API_KEY"):
+                try:
+                    contact = fetch_hubspot_contacts([demo_email.lower()]).get(demo_email.lower(), {})
+                    demo_company = demo_company or contact.get("company") or ""
+                except requests.RequestException:
+                    st.warning("⚠️ HubSpot lookup failed, scoring with the details entered")
+
+            score, insights = get_scoring_batcher().submit((demo_email, demo_company)).result(timeout=10)
             
             st.session_state.demo_score = score
             st.session_state.demo_insights = insights
@@ -141,13 +353,7 @@ elif demo_mode == "Live Scoring":
         st.subheader("🤖 AI Analysis Results")
         if hasattr(st.session_state, 'demo_score'):
             # Score gauge
-            fig = px.pie(
-                values=[st.session_state.demo_score, 100-st.session_state.demo_score],
-                names=['Score', 'Remaining'],
-                title=f"Lead Score: {st.session_state.demo_score}/100",
-                color_discrete_sequence=['#00CC88', '#EEEEEE']
-            )
-            fig.update_layout(showlegend=False, height=300)
+            fig = build_score_gauge(st.session_state.demo_score)
             st.plotly_chart(fig, use_container_width=True)
             
             # Insights
@@ -176,14 +382,13 @@ elif demo_mode == "ROI Calculator":
     
     with col2:
         st.subheader("With AI Automation")
-        automated_time = 0.5  # 30 seconds
-        monthly_hours_auto = (leads_per_month * automated_time) / 60
+        monthly_hours_auto = (leads_per_month * AUTOMATED_MINUTES_PER_LEAD) / 60
         monthly_cost_auto = monthly_hours_auto * hourly_rate
         annual_cost_auto = monthly_cost_auto * 12
         
         # Savings
-        monthly_savings = monthly_cost - monthly_cost_auto
-        annual_savings = annual_cost - annual_cost_auto
+        annual_savings = compute_annual_savings(leads_per_month, time_per_lead, hourly_rate)
+        monthly_savings = annual_savings / 12
         time_saved_hours = monthly_hours - monthly_hours_auto
     
     # Results
@@ -198,16 +403,11 @@ elif demo_mode == "ROI Calculator":
         st.metric("Hours Saved/Month", f"{time_saved_hours:.0f}")
     
     # ROI Chart
-    roi_data = pd.DataFrame({
-        "Process": ["Manual", "AI Automated"],
-        "Annual Cost": [annual_cost, annual_cost_auto],
-        "Time (Hours/Month)": [monthly_hours, monthly_hours_auto]
-    })
+    fig = build_roi_chart(annual_cost, annual_cost_auto)
+    st.plotly_chart(fig, use_container_width=True)
     
-    fig = px.bar(roi_data, x="Process", y="Annual Cost", 
-                 title="Annual Cost Comparison",
-                 color="Process",
-                 color_discrete_sequence=['#FF6B6B', '#4ECDC4'])
+    # Sensitivity across lead volumes and hourly rates
+    fig = build_sensitivity_heatmap(time_per_lead)
     st.plotly_chart(fig, use_container_width=True)
 
 # Call to action
@@ -10,8 +10,10 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Custom CSS for professional look
-st.markdown("""
+# Custom CSS for professional look (static, so built once per process)
+@st.cache_resource
+def _portfolio_css():
+    return """
 <style>
 .main-header {
     font-size: 3rem;
@@ -33,7 +35,12 @@ st.markdown("""
     background: white;
     box-shadow: 0 2px 4px rgba(0,0,0,0.1);
 }
+.metric-row {
+    display: flex;
+    flex-wrap: wrap;
+}
 .metric-card {
+    flex: 1 1 180px;
     background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
     color: white;
     padding: 1rem;
@@ -42,46 +49,33 @@ st.markdown("""
     margin: 0.5rem;
 }
 </style>
-""", unsafe_allow_html=True)
+"""
 
-# Header section
-st.markdown('<h1 class="main-header">🚀 Revenue Automation Specialist</h1>', unsafe_allow_html=True)
-st.markdown('<p class="sub-header">HubSpot + AI + Automation Systems That Drive Business Growth</p>', unsafe_allow_html=True)
 
-# Key metrics row
-col1, col2, col3, col4 = st.columns(4)
+# Key metrics rendered as one HTML blob instead of one element per column
+@st.cache_resource
+def _metric_cards_html():
+    metrics = [
+        ("85%", "Faster Lead Processing"),
+        ("10+ Hours", "Weekly Time Savings"),
+        ("35%", "Conversion Improvement"),
+        ("$50K+", "Annual Value Created")
+    ]
+    cards = "".join(
+        f'<div class="metric-card"><h3>{value}</h3><p>{label}</p></div>'
+        for value, label in metrics
+    )
+    return f'<div class="metric-row">{cards}</div>'
 
-with col1:
-    st.markdown("""
-    <div class="metric-card">
-        <h3>85%</h3>
-        <p>Faster Lead Processing</p>
-    </div>
-    """, unsafe_allow_html=True)
 
-with col2:
-    st.markdown("""
-    <div class="metric-card">
-        <h3>10+ Hours</h3>
-        <p>Weekly Time Savings</p>
-    </div>
-    """, unsafe_allow_html=True)
+st.markdown(_portfolio_css(), unsafe_allow_html=True)
 
-with col3:
-    st.markdown("""
-    <div class="metric-card">
-        <h3>35%</h3>
-        <p>Conversion Improvement</p>
-    </div>
-    """, unsafe_allow_html=True)
+# Header section
+st.markdown('<h1 class="main-header">🚀 Revenue Automation Specialist</h1>', unsafe_allow_html=True)
+st.markdown('<p class="sub-header">HubSpot + AI + Automation Systems That Drive Business Growth</p>', unsafe_allow_html=True)
 
-with col4:
-    st.markdown("""
-    <div class="metric-card">
-        <h3>$50K+</h3>
-        <p>Annual Value Created</p>
-    </div>
-    """, unsafe_allow_html=True)
+# Key metrics row
+st.markdown(_metric_cards_html(), unsafe_allow_html=True)
 
 # Projects section
 st.markdown("## 💼 Featured Projects")
@@ -55,11 +55,32 @@ IMPLEMENTATION TIME: 7-10 days for full multi-system integration
 
 
 import streamlit as st
-import pandas as pd
-import plotly.express as px
+import pandas
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
+from typing import NamedTuple
 import numpy as np
+import pyarrow as pa
+import hashlib
+import json
+import os
+import time
+
+# USE_MODIN=1 swaps in Modin's drop-in pandas API (Ray engine) for large deal histories
+USE_MODIN = bool(os.environ.get("USE_MODIN"))
+if USE_MODIN:
+    import modin.config as modin_config
+    import modin.pandas as pd
+    from modin.utils import to_pandas
+    modin_config.Engine.put("ray")
+else:
+    pd = pandas
+
+# Optional numba backend for the group aggregations; NumPy bincount is used when it is not installed
+try:
+    import numba
+except ImportError:
+    numba = None
 
 # Configure page
 st.set_page_config(
@@ -68,38 +89,383 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Mock data for demo (replace with Google Sheets connection)
+# Fixed category orders: codes double as group ids and keep chart ordering stable
+STAGE_ORDER = ('Qualified', 'Demo', 'Proposal', 'Negotiation', 'Closed Won')
+RISK_LEVELS = ('Low', 'Medium', 'High')
+RISK_COLORS = {'Low': 'green', 'Medium': 'orange', 'High': 'red'}
+FUNNEL_COLORS = ('#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4')
+
+# Simulated AI insights, also the fallback when generated insights are unavailable
+INSIGHTS = (
+    {
+        "type": "Pipeline",
+        "insight": "Your 'Demo' stage has a 67% conversion rate to 'Proposal' - focus on improving demo quality for better results.",
+        "action": "Review demo presentation materials and add more customer-specific use cases.",
+        "priority": "High"
+    },
+    {
+        "type": "Customer Health", 
+        "insight": "DataViz Inc shows declining health score (45) despite stable MRR - potential churn risk.",
+        "action": "Schedule immediate check-in call to identify and address concerns.",
+        "priority": "Critical"
+    },
+    {
+        "type": "Revenue",
+        "insight": "February shows 58% increase in Net MRR - driven by reduced churn rather than new sales.",
+        "action": "Investigate successful retention strategies and replicate across customer base.",
+        "priority": "Medium"
+    }
+)
+
+PRIORITY_ICON = {"High": "🔴", "Critical": "🚨", "Medium": "🟡"}
+
+# GPT-generated insights are only requested when OPENAI_API_KEY is set; bump the prompt
+# version whenever the prompt changes so stale on-disk entries stop matching
+INSIGHTS_MODEL = "gpt-4o-mini"
+INSIGHTS_PROMPT_VERSION = 1
+INSIGHTS_CACHE_DIR = os.environ.get("INSIGHTS_CACHE_DIR", ".insights_cache")
+# Every tab body runs on every rerun, so the model call fails fast and a failure is not
+# retried for INSIGHTS_RETRY_SECONDS within the session
+INSIGHTS_TIMEOUT_SECONDS = 10
+INSIGHTS_RETRY_SECONDS = 300
+
+# Ordered dictionary column with a fixed category list; converts to an ordered pandas Categorical
+def _dictionary_column(values, categories):
+    codes = pd.Index(categories).get_indexer(values)
+    return pa.DictionaryArray.from_arrays(pa.array(codes, type=pa.int8()), pa.array(categories, type=pa.string()), ordered=True)
+
+
 @st.cache_data
 def load_mock_data():
+    # Mock data for demo (replace with Google Sheets connection). The literals live in here so
+    # they are only evaluated on a cache miss, not on every rerun of the script.
+    # Frames are assembled as Arrow tables with explicit types, so pandas never infers a dtype.
+    # Dictionary columns arrive as Categoricals and the close dates are parsed once, here.
     # Sales Pipeline Data
-    pipeline_data = {
-        'Company': ['Acme Corp', 'TechFlow', 'DataViz Inc', 'CloudSys', 'InnovateCo', 'ScaleTech'],
-        'Amount': [25000, 45000, 15000, 35000, 60000, 20000],
-        'Stage': ['Demo', 'Proposal', 'Negotiation', 'Demo', 'Closed Won', 'Qualified'],
-        'Rep': ['John', 'Sarah', 'Mike', 'John', 'Sarah', 'Mike'],
-        'Close_Date': ['2024-02-15', '2024-02-20', '2024-02-10', '2024-02-25', '2024-01-30', '2024-02-18']
-    }
+    pipeline_table = pa.table({
+        'Company': pa.array(['Acme Corp', 'TechFlow', 'DataViz Inc', 'CloudSys', 'InnovateCo', 'ScaleTech'], type=pa.string()),
+        'Amount': pa.array([25000, 45000, 15000, 35000, 60000, 20000], type=pa.int32()),
+        'Stage': _dictionary_column(['Demo', 'Proposal', 'Negotiation', 'Demo', 'Closed Won', 'Qualified'], STAGE_ORDER),
+        'Rep': pa.array(['John', 'Sarah', 'Mike', 'John', 'Sarah', 'Mike'], type=pa.string()).dictionary_encode(),
+        'Close_Date': pa.array(['2024-02-15', '2024-02-20', '2024-02-10', '2024-02-25', '2024-01-30', '2024-02-18'], type=pa.string()).cast(pa.date32())
+    })
+    pipeline_df = pd.DataFrame(pipeline_table.to_pandas(date_as_object=False))
     
     # Customer Health Data  
-    health_data = {
-        'Customer': ['Acme Corp', 'TechFlow', 'DataViz Inc', 'CloudSys', 'InnovateCo'],
-        'MRR': [2500, 4200, 1800, 3200, 5500],
-        'Health_Score': [85, 72, 45, 90, 88],
-        'Risk_Level': ['Low', 'Medium', 'High', 'Low', 'Low']
-    }
+    health_table = pa.table({
+        'Customer': pa.array(['Acme Corp', 'TechFlow', 'DataViz Inc', 'CloudSys', 'InnovateCo'], type=pa.string()),
+        'MRR': pa.array([2500, 4200, 1800, 3200, 5500], type=pa.int32()),
+        'Health_Score': pa.array([85, 72, 45, 90, 88], type=pa.int16()),
+        'Risk_Level': _dictionary_column(['Low', 'Medium', 'High', 'Low', 'Low'], RISK_LEVELS)
+    })
+    health_df = pd.DataFrame(health_table.to_pandas())
     
     # Revenue Metrics
-    revenue_data = {
-        'Month': ['2023-10', '2023-11', '2023-12', '2024-01', '2024-02'],
-        'New_MRR': [12000, 15000, 18000, 15000, 22000],
-        'Churn_MRR': [2000, 2500, 3000, 2000, 1500],
-        'Net_MRR': [10000, 12500, 15000, 13000, 20500]
+    revenue_df = pd.DataFrame(pa.table({
+        'Month': pa.array(['2023-10', '2023-11', '2023-12', '2024-01', '2024-02'], type=pa.string()),
+        'New_MRR': pa.array([12000, 15000, 18000, 15000, 22000], type=pa.int32()),
+        'Churn_MRR': pa.array([2000, 2500, 3000, 2000, 1500], type=pa.int32()),
+        'Net_MRR': pa.array([10000, 12500, 15000, 13000, 20500], type=pa.int32())
+    }).to_pandas())
+    
+    # High-risk rows resolved once from the category codes and shared by the KPIs and the alerts table
+    risk_level = health_df['Risk_Level'].cat
+    high_mask = risk_level.codes.values == risk_level.categories.get_loc('High')
+    
+    # Arrow alert columns, so the alerts table is a row gather instead of a pandas slice
+    health_table = health_table.select(['Customer', 'MRR', 'Health_Score'])
+    
+    # Content hashes, computed once per load: they key the insights cache and the session data versions
+    fingerprints = (_fingerprint(pipeline_df), _fingerprint(health_df), _fingerprint(revenue_df))
+    
+    return pipeline_df, health_df, revenue_df, high_mask, health_table, fingerprints
+
+
+# The kernels are built and compiled (on a 2-row dummy) once per process. Defining them at
+# module level would create fresh dispatchers, and recompile, on every Streamlit rerun.
+@st.cache_resource(show_spinner=False)
+def get_numba_kernels():
+    if numba is None:
+        return None
+
+    # Serial loops: a prange over rows would race on the shared out[code] slots
+    @numba.njit(cache=True)
+    def group_sums(codes, weights, n_groups):
+        out = np.zeros(n_groups, np.float64)
+        for i in range(codes.size):
+            out[codes[i]] += weights[i]
+        return out
+
+    @numba.njit(cache=True)
+    def group_counts(codes, n_groups):
+        out = np.zeros(n_groups, np.int64)
+        for i in range(codes.size):
+            out[codes[i]] += 1
+        return out
+
+    codes = np.zeros(2, dtype=np.int32)
+    group_sums(codes, np.ones(2, dtype=np.float64), 1)
+    group_counts(codes, 1)
+    return group_sums, group_counts
+
+
+# Sum of deal amounts per stage: the categorical codes feed one pass instead of a pandas groupby
+def stage_sum(stages, amounts):
+    n_stages = len(stages.categories)
+    kernels = get_numba_kernels()
+    if kernels is not None:
+        sums = kernels[0](stages.codes.astype(np.int32), amounts.astype(np.float64), n_stages)
+    else:
+        sums = np.bincount(stages.codes, weights=amounts, minlength=n_stages)
+    return stages.categories.values, sums
+
+
+# Rows per category, in category order
+def category_counts(values):
+    n_categories = len(values.categories)
+    kernels = get_numba_kernels()
+    if kernels is not None:
+        return kernels[1](values.codes.astype(np.int32), n_categories)
+    return np.bincount(values.codes, minlength=n_categories)
+
+
+# Month-over-month Net MRR growth as one NumPy pass, formatted straight to a fixed-width string column
+# Keyed on the loader's fingerprint; the frame itself is not hashed
+@st.cache_data
+def growth_rate_text(fp_revenue, _revenue_df):
+    mrr = _revenue_df['Net_MRR'].to_numpy()
+    growth = np.empty(mrr.size, dtype=np.float32)
+    growth[:1] = np.nan
+    np.divide(mrr[1:] - mrr[:-1], mrr[:-1], out=growth[1:])
+    growth_text = np.char.mod('%.1f%%', growth * 100.0)
+    growth_text[:1] = ''
+    return growth_text
+
+
+# Assembled outside the cache from the source columns without copying them; only Growth_Rate is new.
+# (st.cache_data returns an unpickled copy, so caching the whole frame would defeat copy=False.)
+def build_revenue_display(revenue_df, fp_revenue):
+    growth_text = growth_rate_text(fp_revenue, revenue_df)
+    return pd.DataFrame({
+        'Month': revenue_df['Month'],
+        'New_MRR': revenue_df['New_MRR'],
+        'Churn_MRR': revenue_df['Churn_MRR'],
+        'Net_MRR': revenue_df['Net_MRR'],
+        'Growth_Rate': growth_text
+    }, copy=False)
+
+
+# Figure builders: one shared Figure per distinct input tuple, with trace data as NumPy arrays
+@st.cache_resource
+def build_funnel(stages, amounts):
+    colors = [FUNNEL_COLORS[i % len(FUNNEL_COLORS)] for i in range(len(stages))]
+    fig = go.Figure(go.Funnel(x=np.asarray(amounts), y=stages, marker=dict(color=colors)))
+    fig.update_layout(title="Pipeline by Stage", xaxis_title="Amount", yaxis_title="Stage")
+    return fig
+
+
+@st.cache_resource
+def build_health_scatter(health_points):
+    mrr, health_scores, risk_levels = zip(*health_points)
+    mrr, health_scores, risk_levels = np.array(mrr), np.array(health_scores), np.array(risk_levels)
+    # One trace per risk level keeps the legend; marker area scales with MRR like px's size_max=20
+    sizeref = 2.0 * mrr.max() / 20 ** 2
+    fig = go.Figure()
+    for level in RISK_LEVELS:
+        rows = risk_levels == level
+        if rows.any():
+            fig.add_trace(go.Scatter(x=mrr[rows], y=health_scores[rows], mode='markers', name=level,
+                                     marker=dict(color=RISK_COLORS[level], size=mrr[rows], sizemode='area', sizeref=sizeref)))
+    fig.update_layout(title="Customer Health vs MRR", xaxis_title="MRR", yaxis_title="Health_Score", legend_title_text="Risk_Level")
+    return fig
+
+
+@st.cache_resource
+def build_risk_pie(risk_counts):
+    fig = go.Figure(go.Pie(labels=RISK_LEVELS, values=np.asarray(risk_counts),
+                           marker=dict(colors=[RISK_COLORS[level] for level in RISK_LEVELS])))
+    fig.update_layout(title="Customer Risk Distribution")
+    return fig
+
+
+@st.cache_resource
+def build_mrr_trend(revenue_rows):
+    months, new_mrr, churn_mrr, net_mrr = zip(*revenue_rows)
+    # Typed arrays serialize as compact base64 blocks rather than per-element JSON lists
+    new_mrr, churn_mrr, net_mrr = (np.array(col, dtype=np.int32) for col in (new_mrr, churn_mrr, net_mrr))
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=months, y=new_mrr,
+                            mode='lines+markers', name='New MRR', line=dict(color='green')))
+    fig.add_trace(go.Scatter(x=months, y=churn_mrr,
+                            mode='lines+markers', name='Churn MRR', line=dict(color='red')))
+    fig.add_trace(go.Scatter(x=months, y=net_mrr,
+                            mode='lines+markers', name='Net MRR', line=dict(color='blue')))
+    
+    fig.update_layout(title="Monthly Recurring Revenue Trends", xaxis_title="Month", yaxis_title="MRR ($)")
+    return fig
+
+class KPIs(NamedTuple):
+    total_pipeline: int
+    avg_deal: float
+    total_mrr: int
+    high_risk: int
+
+
+# Header metrics in one pass per frame; the High risk count reuses the loader's mask instead of filtering rows.
+# Keyed on the loader's fingerprints plus the selected rep codes, so reruns never hash the frames.
+@st.cache_data
+def compute_kpis(fp_pipeline, fp_health, selected_codes, _pipeline_view, _health_df, _high_mask):
+    pipe_sum, pipe_mean = _pipeline_view['Amount'].agg(['sum', 'mean'])
+    mrr_sum = _health_df['MRR'].sum()
+    high_risk = int(np.count_nonzero(_high_mask))
+    # An empty rep selection leaves no deals to average; report $0 rather than NaN
+    avg_deal = float(pipe_mean) if len(_pipeline_view) else 0.0
+    return KPIs(int(pipe_sum), avg_deal, int(mrr_sum), high_risk)
+
+
+# Per-row uint64 hashes, index excluded. Modin has no pandas.util, so its frames are hashed via pandas.
+def _row_hashes(df):
+    return pandas.util.hash_pandas_object(to_pandas(df) if USE_MODIN else df, index=False).values
+
+
+# Content hash of a frame, so the insight caches only miss when the underlying data changes
+def _fingerprint(df):
+    return hashlib.blake2b(_row_hashes(df).tobytes(), digest_size=16).hexdigest()
+
+
+# openai is imported on first use: it is only needed when OPENAI_API_KEY is set
+@st.cache_resource
+def get_openai():
+    from openai import OpenAI
+    return OpenAI(timeout=INSIGHTS_TIMEOUT_SECONDS, max_retries=0)
+
+
+# Resolved only when a call has actually failed, so openai stays unimported without a key
+def _openai_api_error():
+    from openai import APIError
+    return APIError
+
+
+def _request_insights(pipeline_df, health_df, revenue_df):
+    data = {
+        "pipeline": json.loads(pipeline_df.to_json(orient="records", date_format="iso")),
+        "customer_health": json.loads(health_df.to_json(orient="records")),
+        "revenue": json.loads(revenue_df.to_json(orient="records"))
     }
+    response = get_openai().chat.completions.create(
+        model=INSIGHTS_MODEL,
+        response_format={"type": "json_object"},
+        messages=[
+            {"role": "system", "content": "You are a RevOps analyst. Return JSON of the form {\"insights\": [...]} with exactly three items, "
+                                          "each with keys type (Pipeline, Customer Health or Revenue), insight, action and priority (Critical, High or Medium)."},
+            {"role": "user", "content": json.dumps(data)}
+        ]
+    )
+    payload = json.loads(response.choices[0].message.content)
+    insights = payload.get("insights") if isinstance(payload, dict) else None
+    if not _valid_insights(insights):
+        raise ValueError("Unexpected insights format")
+    return tuple(insights)
+
+
+# Tab 4 indexes every one of these keys, so anything else is rejected before it is cached or shown
+def _valid_insights(insights):
+    return isinstance(insights, list) and len(insights) > 0 and all(
+        isinstance(insight, dict)
+        and all(isinstance(insight.get(key), str) for key in ("type", "insight", "action", "priority"))
+        and insight["priority"] in PRIORITY_ICON
+        for insight in insights
+    )
+
+
+# Two-tier insight cache: st.cache_data serves reruns in this process, the JSON files in
+# INSIGHTS_CACHE_DIR survive restarts. The frames are passed unhashed; the fingerprints are the key.
+# Failures raise instead of returning a fallback, so st.cache_data never memoizes them.
+@st.cache_data(show_spinner=False)
+def generate_insights(fp_pipeline, fp_health, fp_revenue, _pipeline_df, _health_df, _revenue_df):
+    if not os.environ.get("OPENAI_API_KEY"):
+        return {"insights": INSIGHTS, "model": None, "prompt_version": None, "generated_at": None}
     
-    return pd.DataFrame(pipeline_data), pd.DataFrame(health_data), pd.DataFrame(revenue_data)
+    key = hashlib.blake2b(f"{INSIGHTS_MODEL}:{INSIGHTS_PROMPT_VERSION}:{fp_pipeline}:{fp_health}:{fp_revenue}".encode(), digest_size=16).hexdigest()
+    path = os.path.join(INSIGHTS_CACHE_DIR, f"{key}.json")
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = None
+        # A malformed entry is treated as a miss and overwritten below
+        if isinstance(entry, dict) and _valid_insights(entry.get("insights")):
+            entry["insights"] = tuple(entry["insights"])
+            return entry
+    
+    insights = _request_insights(_pipeline_df, _health_df, _revenue_df)
+    entry = {
+        "insights": insights,
+        "model": INSIGHTS_MODEL,
+        "prompt_version": INSIGHTS_PROMPT_VERSION,
+        "generated_at": datetime.now().isoformat(timespec="seconds")
+    }
+    os.makedirs(INSIGHTS_CACHE_DIR, exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        json.dump({**entry, "insights": list(insights)}, f)
+    os.replace(path + ".tmp", path)
+    return entry
+
+
+# Warm the optional numba kernels before any tab needs them
+get_numba_kernels()
+
+# Rebuild a figure only when its data version moved; otherwise reuse this session's last one
+def cached_figure(name, version, build):
+    cached = st.session_state['figures'].get(name)
+    if cached is None or cached[0] != version:
+        cached = (version, build())
+        st.session_state['figures'][name] = cached
+    return cached[1]
+
 
 # Load data
-pipeline_df, health_df, revenue_df = load_mock_data()
+pipeline_df, health_df, revenue_df, high_mask, health_table, fingerprints = load_mock_data()
+
+# Sidebar filters and controls (read before the tabs so the data versions below are current)
+st.sidebar.header("Dashboard Controls")
+
+# Date range filter
+date_range = st.sidebar.date_input(
+    "Select Date Range",
+    value=(datetime.now() - timedelta(days=30), datetime.now()),
+    max_value=datetime.now()
+)
+
+# Sales rep filter
+selected_reps = st.sidebar.multiselect(
+    "Filter by Sales Rep",
+    options=pipeline_df['Rep'].cat.categories,
+    default=pipeline_df['Rep'].cat.categories
+)
+
+# Rep filter on the category codes: np.isin over small ints instead of Series.isin over strings
+rep = pipeline_df['Rep'].cat
+selected_codes = np.flatnonzero(rep.categories.isin(selected_reps))
+rep_mask = np.isin(rep.codes.values, selected_codes)
+pipeline_view = pipeline_df if rep_mask.all() else pipeline_df[rep_mask]
+kpis = compute_kpis(fingerprints[0], fingerprints[1], tuple(selected_codes.tolist()), pipeline_view, health_df, high_mask)
+
+# data_version moves on a data reload or a sidebar filter change; base_version only on a
+# data reload, for tabs the filters don't touch (health, revenue trend, insights)
+ss = st.session_state
+ss.setdefault('data_version', 0)
+ss.setdefault('base_version', 0)
+ss.setdefault('figures', {})
+if ss.get('fingerprints') != fingerprints:
+    ss['fingerprints'] = fingerprints
+    ss['base_version'] += 1
+    ss['data_version'] += 1
+filters = (tuple(selected_reps), tuple(date_range))
+if ss.get('filters') != filters:
+    ss['filters'] = filters
+    ss['data_version'] += 1
 
 # Title and header
 st.title("🎯 Revenue Operations Dashboard")
@@ -109,20 +475,16 @@ st.markdown("Real-time insights into your sales pipeline and customer health")
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    total_pipeline = pipeline_df['Amount'].sum()
-    st.metric("Pipeline Value", f"${total_pipeline:,}", "+15%")
+    st.metric("Pipeline Value", f"${kpis.total_pipeline:,}", "+15%")
 
 with col2:
-    avg_deal = pipeline_df['Amount'].mean()
-    st.metric("Avg Deal Size", f"${avg_deal:,.0f}", "+8%")
+    st.metric("Avg Deal Size", f"${kpis.avg_deal:,.0f}", "+8%")
 
 with col3:
-    total_mrr = health_df['MRR'].sum()
-    st.metric("Total MRR", f"${total_mrr:,}", "+12%")
+    st.metric("Total MRR", f"${kpis.total_mrr:,}", "+12%")
 
 with col4:
-    high_risk = len(health_df[health_df['Risk_Level'] == 'High'])
-    st.metric("High Risk Customers", high_risk, "-2")
+    st.metric("High Risk Customers", kpis.high_risk, "-2")
 
 # Main dashboard sections
 tab1, tab2, tab3, tab4 = st.tabs(["📊 Pipeline Analysis", "💡 Customer Health", "💰 Revenue Trends", "🚨 AI Insights"])
@@ -134,20 +496,21 @@ with tab1:
     
     with col1:
         # Pipeline by stage
-        stage_summary = pipeline_df.groupby('Stage')['Amount'].sum().reset_index()
-        fig = px.funnel(stage_summary, x='Amount', y='Stage', 
-                       title="Pipeline by Stage",
-                       color_discrete_sequence=['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4'])
+        def pipeline_funnel():
+            stages, stage_amounts = stage_sum(pipeline_view['Stage'].values, pipeline_view['Amount'].values)
+            return build_funnel(tuple(stages.tolist()), tuple(stage_amounts.tolist()))
+        fig = cached_figure('funnel', ss['data_version'], pipeline_funnel)
         st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         # Top deals
         st.subheader("Top Opportunities")
-        top_deals = pipeline_df.nlargest(5, 'Amount')[['Company', 'Amount', 'Stage']]
-        for _, deal in top_deals.iterrows():
-            st.write(f"**{deal['Company']}**")
-            st.write(f"${deal['Amount']:,} - {deal['Stage']}")
-            st.write("---")
+        top_deals = pipeline_view.nlargest(5, 'Amount')
+        # One markdown element for all five deals (dollar signs escaped so they don't pair up as LaTeX)
+        st.markdown("".join(
+            f"**{company}**\n\n\\${amount:,} - {stage}\n\n---\n\n"
+            for company, amount, stage in zip(top_deals['Company'].values, top_deals['Amount'].values, top_deals['Stage'].values)
+        ))
 
 with tab2:
     st.subheader("Customer Health Monitoring")
@@ -156,97 +519,61 @@ with tab2:
     
     with col1:
         # Health score distribution
-        fig = px.scatter(health_df, x='MRR', y='Health_Score', 
-                        size='MRR', color='Risk_Level',
-                        title="Customer Health vs MRR",
-                        color_discrete_map={'Low': 'green', 'Medium': 'orange', 'High': 'red'})
+        fig = cached_figure('health_scatter', ss['base_version'], lambda: build_health_scatter(
+            tuple(health_df[['MRR', 'Health_Score', 'Risk_Level']].itertuples(index=False, name=None))))
         st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         # Risk level breakdown
-        risk_counts = health_df['Risk_Level'].value_counts()
-        fig = px.pie(values=risk_counts.values, names=risk_counts.index,
-                    title="Customer Risk Distribution",
-                    color_discrete_map={'Low': 'green', 'Medium': 'orange', 'High': 'red'})
+        fig = cached_figure('risk_pie', ss['base_version'], lambda: build_risk_pie(
+            tuple(category_counts(health_df['Risk_Level'].values).tolist())))
         st.plotly_chart(fig, use_container_width=True)
     
     # High-risk customer alerts
-    high_risk_customers = health_df[health_df['Risk_Level'] == 'High']
-    if not high_risk_customers.empty:
+    high_risk_rows = np.flatnonzero(high_mask)
+    if high_risk_rows.size:
         st.warning("⚠️ High-Risk Customers Requiring Attention")
-        st.dataframe(high_risk_customers[['Customer', 'MRR', 'Health_Score']], use_container_width=True)
+        st.dataframe(health_table.take(high_risk_rows), use_container_width=True)
 
 with tab3:
     st.subheader("Revenue Growth Trends")
     
     # MRR trend chart
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=revenue_df['Month'], y=revenue_df['New_MRR'],
-                            mode='lines+markers', name='New MRR', line=dict(color='green')))
-    fig.add_trace(go.Scatter(x=revenue_df['Month'], y=revenue_df['Churn_MRR'],
-                            mode='lines+markers', name='Churn MRR', line=dict(color='red')))
-    fig.add_trace(go.Scatter(x=revenue_df['Month'], y=revenue_df['Net_MRR'],
-                            mode='lines+markers', name='Net MRR', line=dict(color='blue')))
-    
-    fig.update_layout(title="Monthly Recurring Revenue Trends", xaxis_title="Month", yaxis_title="MRR ($)")
+    fig = cached_figure('mrr_trend', ss['base_version'], lambda: build_mrr_trend(
+        tuple(revenue_df[['Month', 'New_MRR', 'Churn_MRR', 'Net_MRR']].itertuples(index=False, name=None))))
     st.plotly_chart(fig, use_container_width=True)
     
     # Revenue metrics table
     st.subheader("Monthly Performance")
-    revenue_display = revenue_df.copy()
-    revenue_display['Growth_Rate'] = revenue_display['Net_MRR'].pct_change() * 100
-    revenue_display['Growth_Rate'] = revenue_display['Growth_Rate'].round(1).astype(str) + '%'
-    st.dataframe(revenue_display, use_container_width=True)
+    st.dataframe(build_revenue_display(revenue_df, fingerprints[2]), use_container_width=True)
 
 with tab4:
     st.subheader("🤖 AI-Powered Business Insights")
     
-    # Simulated AI insights
-    insights = [
-        {
-            "type": "Pipeline",
-            "insight": "Your 'Demo' stage has a 67% conversion rate to 'Proposal' - focus on improving demo quality for better results.",
-            "action": "Review demo presentation materials and add more customer-specific use cases.",
-            "priority": "High"
-        },
-        {
-            "type": "Customer Health", 
-            "insight": "DataViz Inc shows declining health score (45) despite stable MRR - potential churn risk.",
-            "action": "Schedule immediate check-in call to identify and address concerns.",
-            "priority": "Critical"
-        },
-        {
-            "type": "Revenue",
-            "insight": "February shows 58% increase in Net MRR - driven by reduced churn rather than new sales.",
-            "action": "Investigate successful retention strategies and replicate across customer base.",
-            "priority": "Medium"
-        }
-    ]
+    static_insights = {"insights": INSIGHTS, "model": None, "prompt_version": None, "generated_at": None}
+    failed_at = ss.setdefault('insights_failed_at', {})
+    if time.monotonic() - failed_at.get(fingerprints, -INSIGHTS_RETRY_SECONDS) < INSIGHTS_RETRY_SECONDS:
+        generated = None
+    else:
+        try:
+            generated = generate_insights(*fingerprints, pipeline_df, health_df, revenue_df)
+            failed_at.pop(fingerprints, None)
+        except (_openai_api_error(), ValueError):
+            # Failures aren't cached by generate_insights; remember them here so other reruns skip the call
+            failed_at[fingerprints] = time.monotonic()
+            generated = None
+    if generated is None:
+        st.warning("⚠️ AI insight generation is unavailable right now, showing the standard insights")
+        generated = static_insights
+    if generated["generated_at"]:
+        st.caption(f"Generated by {generated['model']} at {generated['generated_at']}")
     
-    for insight in insights:
-        priority_color = {"High": "🔴", "Critical": "🚨", "Medium": "🟡"}
-        st.write(f"{priority_color[insight['priority']]} **{insight['type']} Analysis**")
+    for insight in generated["insights"]:
+        st.write(f"{PRIORITY_ICON[insight['priority']]} **{insight['type']} Analysis**")
         st.info(insight['insight'])
         st.success(f"**Recommended Action:** {insight['action']}")
         st.write("---")
 
-# Sidebar filters and controls
-st.sidebar.header("Dashboard Controls")
-
-# Date range filter
-date_range = st.sidebar.date_input(
-    "Select Date Range",
-    value=(datetime.now() - timedelta(days=30), datetime.now()),
-    max_value=datetime.now()
-)
-
-# Sales rep filter
-selected_reps = st.sidebar.multiselect(
-    "Filter by Sales Rep",
-    options=pipeline_df['Rep'].unique(),
-    default=pipeline_df['Rep'].unique()
-)
-
 # Auto-refresh toggle
 auto_refresh = st.sidebar.checkbox("Auto-refresh data (every 5 minutes)")
 